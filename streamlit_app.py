@@ -1,73 +1,190 @@
+import functools
+import os
+import re
+import threading
 import streamlit as st
 import requests
+import requests_cache
 import pandas as pd
 from bs4 import BeautifulSoup
+try:
+    # much faster than stdlib json on large board payloads
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    # C-backed parser, much faster than bs4's html.parser on large board pages
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlencode
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
+
+# How many boards to scrape at once. Lower it if a host starts rate limiting.
+MAX_WORKERS = int(os.environ.get("JOBFINDER_PARALLEL", "8"))
+
+# One pooled session for all board requests so keep-alive connections are
+# reused across companies on the same host (e.g. jobs.lever.co). Retry
+# handles connect errors and transient 429/5xx with exponential backoff.
+# Read timeouts aren't retried and Retry-After is ignored (it can ask for
+# hours), so a slow or rate-limited board can't stall the whole search.
+# Board listings change at most hourly, so responses are cached on disk for
+# an hour; if a board errors we serve the last good copy instead of nothing.
+SESSION = requests_cache.CachedSession(
+    ".cache/jobfinder",
+    backend="sqlite",
+    expire_after=3600,
+    allowable_codes=[200],
+    stale_if_error=True
+)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        connect=3,
+        read=0,
+        status=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=False
+    )
+))
 
 # ---------------------------
 # Utilities
 # ---------------------------
 
+# Jobs are passed around column-oriented: one list per field, same length,
+# so pandas can build frames straight from the columns.
+JOB_FIELDS = ("company", "title", "location", "location_lc", "remote", "source", "url", "date_posted")
+
+def empty_jobs():
+    return {field: [] for field in JOB_FIELDS}
+
+def add_job(jobs, company, title, location, source, url, date_posted):
+    """Append one posting to a column-oriented jobs dict."""
+    # lowercase the location once; it feeds both the remote guess and the filter
+    location_lc = location.lower() if location else ""
+    jobs["company"].append(company)
+    jobs["title"].append(title)
+    jobs["location"].append(location)
+    jobs["location_lc"].append(location_lc)
+    jobs["remote"].append(guess_remote(location_lc))
+    jobs["source"].append(source)
+    jobs["url"].append(url)
+    jobs["date_posted"].append(date_posted)
+
+def parse_json(resp):
+    """Decode a JSON response body, with orjson when it's available."""
+    if orjson is not None:
+        try:
+            return orjson.loads(resp.content)
+        except orjson.JSONDecodeError:
+            pass
+    return resp.json()
+
+# One alternation scans the text once instead of once per keyword.
+_REMOTE_RE = re.compile(r"remote|anywhere|work from home|distributed", re.IGNORECASE)
+
+# Location strings repeat heavily within a board, so classify each one once.
+@functools.lru_cache(maxsize=4096)
 def guess_remote(text: str) -> bool:
     """Heuristic: mark remote if job/location text mentions remote or 'anywhere'."""
-    if not text:
-        return False
-    t = text.lower()
-    keywords = ["remote", "anywhere", "work from home", "distributed"]
-    return any(k in t for k in keywords)
-
-def filter_results(jobs, role_kw, loc_kw, extra_kw):
-    """Apply basic keyword filters client-side."""
+    return bool(text) and _REMOTE_RE.search(text) is not None
+
+@st.cache_data
+def filter_results(jobs, role_kw, loc_kw, extra_kw) -> pd.DataFrame:
+    """Apply basic keyword filters client-side, returning the matching rows."""
     role_kw = role_kw.strip().lower()
     loc_kw = loc_kw.strip().lower()
     extra_kw = extra_kw.strip().lower()
 
-    filtered = []
-    for job in jobs:
-        blob = " ".join([
-            job.get("title",""),
-            job.get("company",""),
-            job.get("location",""),
-            job.get("source","")
-        ]).lower()
-
-        # role keyword must match title
-        if role_kw and role_kw not in job.get("title","").lower():
-            continue
-        # location keyword must match location/remote text
-        if loc_kw and loc_kw not in (job.get("location","").lower() + " " + job.get("title","").lower()):
-            continue
-        # extra keyword (industry / salary / clearance string) must match anywhere
-        if extra_kw and extra_kw not in blob:
-            continue
-
-        filtered.append(job)
-
-    return filtered
+    df = pd.DataFrame(jobs)
+    if df.empty or not (role_kw or loc_kw or extra_kw):
+        return df
+
+    # Checks run most-selective first, and each one only scans the rows that
+    # survived the previous one, so non-matching rows drop out cheaply.
+    # Each field is lowercased once and reused across the checks below.
+    title = df["title"].str.lower()
+
+    # role keyword must match title
+    if role_kw:
+        keep = title.str.contains(role_kw, regex=False, na=False)
+        df, title = df[keep], title[keep]
+    # location keyword must match location/remote text
+    if loc_kw:
+        loc = df["location_lc"]
+        keep = (loc.str.contains(loc_kw, regex=False, na=False) |
+                title.str.contains(loc_kw, regex=False, na=False))
+        df, title = df[keep], title[keep]
+    # extra keyword (industry / salary / clearance string) must match anywhere;
+    # the blob is only built when it's actually needed
+    if extra_kw:
+        blob = (title + " " + df["company"].str.lower() + " " +
+                df["location_lc"] + " " + df["source"].str.lower())
+        df = df[blob.str.contains(extra_kw, regex=False, na=False)]
+
+    return df.reset_index(drop=True)
 
 
 # ---------------------------
 # Scraper: Lever
 # ---------------------------
 
+def _parse_lever_html(html):
+    """
+    Extract (title, location, href) for each posting on a Lever board page.
+    Uses selectolax when installed, BeautifulSoup otherwise.
+    """
+    postings = []
+    if HTMLParser is not None:
+        tree = HTMLParser(html)
+        for p in tree.css("div.posting"):
+            title_el = p.css_first("h5.posting-title")
+            loc_el = p.css_first("span.sort-by-location")
+            link_el = p.css_first("a.posting-title")
+
+            title = title_el.text(strip=True) if title_el else ""
+            loc = loc_el.text(strip=True) if loc_el else ""
+            href = (link_el.attributes.get("href") or "") if link_el else ""
+            postings.append((title, loc, href))
+        return postings
+
+    soup = BeautifulSoup(html, "html.parser")
+    for p in soup.select("div.posting"):
+        title_el = p.select_one("h5.posting-title")
+        loc_el = p.select_one("span.sort-by-location")
+        link_el = p.select_one("a.posting-title")
+
+        title = title_el.get_text(strip=True) if title_el else ""
+        loc = loc_el.get_text(strip=True) if loc_el else ""
+        href = link_el["href"] if link_el and link_el.has_attr("href") else ""
+        postings.append((title, loc, href))
+    return postings
+
 def scrape_lever(company_handle):
     """
     Pull jobs from Lever for a given company handle.
     Example handle: 'saic', 'anduril-industries', 'openai', etc.
     We'll try the public API-ish JSON if available, otherwise HTML fallback.
     """
-    out = []
+    out = empty_jobs()
 
     # Lever usually exposes a JSON-style endpoint like:
     # https://jobs.lever.co/{company}?mode=json
     json_url = f"https://jobs.lever.co/{company_handle}?mode=json"
 
     try:
-        resp = requests.get(json_url, timeout=10)
+        resp = SESSION.get(json_url, timeout=10)
         if resp.status_code == 200 and resp.headers.get("content-type", "").startswith("application/json"):
-            data = resp.json()
+            data = parse_json(resp)
             for item in data:
                 title = item.get("text", "")
                 loc = item.get("additional", {}).get("location", "")
@@ -82,15 +199,7 @@ def scrape_lever(company_handle):
                     except Exception:
                         pass
 
-                out.append({
-                    "company": company_handle,
-                    "title": title,
-                    "location": loc,
-                    "remote": guess_remote(loc),
-                    "source": "Lever",
-                    "url": lever_url,
-                    "date_posted": date_posted
-                })
+                add_job(out, company_handle, title, loc, "Lever", lever_url, date_posted)
             return out
     except Exception:
         pass
@@ -98,31 +207,14 @@ def scrape_lever(company_handle):
     # HTML fallback if no JSON:
     html_url = f"https://jobs.lever.co/{company_handle}"
     try:
-        resp = requests.get(html_url, timeout=10)
+        resp = SESSION.get(html_url, timeout=10)
         if resp.status_code != 200:
             return out
-        soup = BeautifulSoup(resp.text, "html.parser")
-        postings = soup.select("div.posting")
-        for p in postings:
-            title_el = p.select_one("h5.posting-title")
-            loc_el = p.select_one("span.sort-by-location")
-            link_el = p.select_one("a.posting-title")
-
-            title = title_el.get_text(strip=True) if title_el else ""
-            loc = loc_el.get_text(strip=True) if loc_el else ""
-            href = link_el["href"] if link_el and link_el.has_attr("href") else ""
+        for title, loc, href in _parse_lever_html(resp.text):
             if href and not href.startswith("http"):
                 href = f"https://jobs.lever.co{href}"
 
-            out.append({
-                "company": company_handle,
-                "title": title,
-                "location": loc,
-                "remote": guess_remote(loc),
-                "source": "Lever",
-                "url": href,
-                "date_posted": ""
-            })
+            add_job(out, company_handle, title, loc, "Lever", href, "")
     except Exception:
         pass
 
@@ -133,6 +225,32 @@ def scrape_lever(company_handle):
 # Scraper: Greenhouse
 # ---------------------------
 
+# board_token -> (ETag, parsed jobs) from the last full download, so an
+# unchanged board costs a 304 (or a cache hit) instead of another JSON parse.
+# Shared by every session and written from scraper threads, so it's bounded
+# (least recently used board is evicted first) and guarded by a lock.
+_GH_ETAGS_MAX = 64
+_GH_ETAGS = OrderedDict()
+_GH_ETAGS_LOCK = threading.Lock()
+
+def _etag_get(board_token):
+    with _GH_ETAGS_LOCK:
+        entry = _GH_ETAGS.get(board_token)
+        if entry is not None:
+            _GH_ETAGS.move_to_end(board_token)
+        return entry
+
+def _etag_put(board_token, etag, jobs):
+    with _GH_ETAGS_LOCK:
+        _GH_ETAGS[board_token] = (etag, jobs)
+        _GH_ETAGS.move_to_end(board_token)
+        while len(_GH_ETAGS) > _GH_ETAGS_MAX:
+            _GH_ETAGS.popitem(last=False)
+
+def _etag_clear():
+    with _GH_ETAGS_LOCK:
+        _GH_ETAGS.clear()
+
 def scrape_greenhouse(board_token):
     """
     Pull jobs from Greenhouse for a given board token.
@@ -140,28 +258,29 @@ def scrape_greenhouse(board_token):
     Greenhouse exposes a nice JSON board API:
     https://boards-api.greenhouse.io/v1/boards/{token}/jobs
     """
-    out = []
+    out = empty_jobs()
+    # The list endpoint only embeds the (multi-KB, HTML) job descriptions when
+    # called with ?content=true. We never read them, so don't ask for them.
     api_url = f"https://boards-api.greenhouse.io/v1/boards/{board_token}/jobs"
+    last = _etag_get(board_token)
+    headers = {"If-None-Match": last[0]} if last else {}
     try:
-        resp = requests.get(api_url, timeout=10)
+        resp = SESSION.get(api_url, headers=headers, timeout=10)
+        etag = resp.headers.get("ETag")
+        if last and (resp.status_code == 304 or (resp.status_code == 200 and etag == last[0])):
+            return last[1]
         if resp.status_code != 200:
             return out
-        data = resp.json()
+        data = parse_json(resp)
         for job in data.get("jobs", []):
             title = job.get("title", "")
             locs = job.get("location", {}).get("name", "")
             gh_url = job.get("absolute_url", "")
             date_posted = job.get("updated_at", "")[:10]
 
-            out.append({
-                "company": board_token,
-                "title": title,
-                "location": locs,
-                "remote": guess_remote(locs),
-                "source": "Greenhouse",
-                "url": gh_url,
-                "date_posted": date_posted
-            })
+            add_job(out, board_token, title, locs, "Greenhouse", gh_url, date_posted)
+        if etag:
+            _etag_put(board_token, etag, out)
     except Exception:
         pass
 
@@ -223,20 +342,53 @@ def google_job_search(query: str, api_key: str, cx_id: str, num: int = 10) -> pd
 # Fetch from multiple companies
 # ---------------------------
 
-def fetch_all_jobs(lever_companies, greenhouse_tokens):
-    jobs = []
-
-    for c in lever_companies:
-        try:
-            jobs.extend(scrape_lever(c))
-        except Exception as e:
-            st.warning(f"Error scraping Lever for {c}: {e}")
+# "name (lever)" or "name (greenhouse)", annotation optional
+_BOARD_RE = re.compile(r"^(.*?)\s*\((lever|greenhouse)\)\s*$", re.IGNORECASE)
+
+@st.cache_data
+def parse_boards(text: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Split the companies textarea into (lever handles, greenhouse tokens)."""
+    lever_targets = []
+    greenhouse_targets = []
+    for raw in text.strip().splitlines():
+        raw = raw.strip()
+        if not raw:
+            continue
+        m = _BOARD_RE.match(raw)
+        if m is None:
+            # if user forgets to annotate, just assume it's Lever first
+            lever_targets.append(raw)
+        elif m.group(2).lower() == "greenhouse":
+            greenhouse_targets.append(m.group(1))
+        else:
+            lever_targets.append(m.group(1))
+    return tuple(lever_targets), tuple(greenhouse_targets)
 
-    for g in greenhouse_tokens:
-        try:
-            jobs.extend(scrape_greenhouse(g))
-        except Exception as e:
-            st.warning(f"Error scraping Greenhouse for {g}: {e}")
+@st.cache_data(ttl=1800, show_spinner="Fetching boards...")
+def fetch_all_jobs(lever_companies: Tuple[str, ...], greenhouse_tokens: Tuple[str, ...]):
+    """
+    Scrape every board and return the combined jobs columns. Memoized per
+    (lever, greenhouse) tuple so widget reruns don't re-scrape.
+    """
+    jobs = empty_jobs()
+
+    tasks = [("Lever", scrape_lever, c) for c in lever_companies] + \
+            [("Greenhouse", scrape_greenhouse, g) for g in greenhouse_tokens]
+
+    # Scrapers are network-bound, so run them side by side on worker threads;
+    # results are collected back here on the script thread, where st.* works.
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {pool.submit(fn, arg): (source, arg) for source, fn, arg in tasks}
+        for f in as_completed(futures):
+            source, arg = futures[f]
+            # one failing board shouldn't abort the batch
+            try:
+                result = f.result()
+            except Exception as e:
+                st.warning(f"Error scraping {source} for {arg}: {e}")
+                continue
+            for field, values in result.items():
+                jobs[field].extend(values)
 
     return jobs
 
@@ -245,15 +397,25 @@ def fetch_all_jobs(lever_companies, greenhouse_tokens):
 # Streamlit App
 # ---------------------------
 
+# Column order for the results / saved tables and their CSV exports
+DISPLAY_COLS = ["title", "company", "location", "remote", "date_posted", "source", "url"]
+
 def init_state():
     if "saved_jobs" not in st.session_state:
         st.session_state["saved_jobs"] = []
+    # urls of saved_jobs, kept alongside for O(1) duplicate checks
+    st.session_state.setdefault("saved_urls", set())
 
 def save_job(job_row):
     # avoid duplicates by url
-    urls = [j["url"] for j in st.session_state["saved_jobs"]]
-    if job_row["url"] not in urls:
+    if job_row["url"] not in st.session_state["saved_urls"]:
         st.session_state["saved_jobs"].append(job_row)
+        st.session_state["saved_urls"].add(job_row["url"])
+
+@st.cache_data
+def _df_to_csv(df: pd.DataFrame) -> bytes:
+    # cached on the frame's contents so reruns don't re-serialize unchanged results
+    return df.to_csv(index=False).encode("utf-8")
 
 def main():
     st.set_page_config(
@@ -262,6 +424,11 @@ def main():
     )
     init_state()
 
+    force_refresh = st.sidebar.checkbox(
+        "Force refresh",
+        help="Ignore cached board listings and re-download everything."
+    )
+
     st.title("🔍 Job Finder MVP")
     st.write("Search Lever + Greenhouse job boards for senior roles, QA, SDET, AI, Defense, etc.")
 
@@ -283,45 +450,39 @@ def main():
     all_jobs_df = pd.DataFrame()
 
     if submitted:
-        # parse company lines
-        lever_targets = []
-        greenhouse_targets = []
-        for raw in companies_input.strip().splitlines():
-            raw = raw.strip()
-            if not raw:
-                continue
-            # crude parse: "name (lever)" or "name (greenhouse)"
-            if raw.endswith("(lever)"):
-                lever_targets.append(raw.replace("(lever)", "").strip())
-            elif raw.endswith("(greenhouse)"):
-                greenhouse_targets.append(raw.replace("(greenhouse)", "").strip())
-            else:
-                # if user forgets to annotate, just assume it's Lever first
-                lever_targets.append(raw)
+        lever_targets, greenhouse_targets = parse_boards(companies_input)
+
+        if force_refresh:
+            SESSION.cache.clear()
+            _etag_clear()
+            fetch_all_jobs.clear()
 
         jobs = fetch_all_jobs(lever_targets, greenhouse_targets)
-        jobs_filtered = filter_results(jobs, role_kw, loc_kw, extra_kw)
+        all_jobs_df = filter_results(jobs, role_kw, loc_kw, extra_kw)
 
-        if jobs_filtered:
-            all_jobs_df = pd.DataFrame(jobs_filtered)
+        if not all_jobs_df.empty:
+            # few distinct sources/companies: store them as integer codes
+            all_jobs_df = all_jobs_df.astype({"source": "category", "remote": "bool", "company": "category"})
             # nice sort: newest first if we have a date
             if "date_posted" in all_jobs_df.columns:
-                all_jobs_df["date_posted"] = pd.to_datetime(all_jobs_df["date_posted"], errors="coerce")
+                # both scrapers emit YYYY-MM-DD, so skip pandas' format inference
+                all_jobs_df["date_posted"] = pd.to_datetime(all_jobs_df["date_posted"], format="%Y-%m-%d", errors="coerce")
                 all_jobs_df = all_jobs_df.sort_values(by="date_posted", ascending=False)
 
+            display_df = all_jobs_df.loc[:, DISPLAY_COLS]
+
             st.subheader(f"Found {len(all_jobs_df)} matching roles")
             st.caption("Click a row to copy the URL and apply fast.")
 
             st.dataframe(
-                all_jobs_df[["title", "company", "location", "remote", "date_posted", "source", "url"]],
+                display_df,
                 use_container_width=True
             )
 
             # download button
-            csv_data = all_jobs_df.to_csv(index=False)
             st.download_button(
                 label="⬇️ Download results as CSV",
-                data=csv_data,
+                data=_df_to_csv(display_df),
                 file_name="job_search_results.csv",
                 mime="text/csv"
             )
@@ -355,8 +516,8 @@ def main():
         )
 
 
-       GOOGLE_API_KEY = " "
-       GOOGLE_CX_ID   = " "
+        GOOGLE_API_KEY = " "
+        GOOGLE_CX_ID   = " "
 
         run_google = st.button("🔎 Search Google")
 
@@ -391,15 +552,14 @@ def main():
     # sidebar or bottom section: saved jobs
     st.markdown("## ⭐ Saved jobs this session")
     if st.session_state["saved_jobs"]:
-        saved_df = pd.DataFrame(st.session_state["saved_jobs"])
+        saved_df = pd.DataFrame(st.session_state["saved_jobs"]).loc[:, DISPLAY_COLS]
         st.dataframe(
-            saved_df[["title", "company", "location", "remote", "date_posted", "source", "url"]],
+            saved_df,
             use_container_width=True
         )
-        saved_csv = saved_df.to_csv(index=False)
         st.download_button(
             label="⬇️ Download saved jobs CSV",
-            data=saved_csv,
+            data=_df_to_csv(saved_df),
             file_name="saved_jobs.csv",
             mime="text/csv"
         )